@@ -1,14 +1,13 @@
 # Import required libraries
 import streamlit as st
 import json
-import aiohttp
 import asyncio
 import os
 import tempfile
 import zipfile
 from datetime import datetime
-from spl_token_analysis import get_token_details_async
-from spl_report_generator import create_pdf
+from spl_token_analysis import create_session, get_token_details_async
+from spl_report_generator import create_pdf, create_pdf_bytes
 
 # Initialize session state
 def init_session_state():
@@ -312,7 +311,7 @@ def render_pump_fun_metrics(result_dict):
 
 async def analyze_token(token_address):
     """Analyze a single token address."""
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         details, _ = await get_token_details_async(token_address, session)
         return details
 
@@ -334,15 +333,12 @@ def render_download_buttons(result_dict, token_address):
         )
     
     with col2:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            pdf_path = create_pdf(result_dict, temp_dir)
-            with open(pdf_path, "rb") as pdf_file:
-                st.download_button(
-                    "Download PDF",
-                    data=pdf_file.read(),
-                    file_name=f"token_analysis_{token_address}.pdf",
-                    mime="application/pdf"
-                )
+        st.download_button(
+            "Download PDF",
+            data=create_pdf_bytes(result_dict),
+            file_name=f"token_analysis_{token_address}.pdf",
+            mime="application/pdf"
+        )
 
 def render_batch_download_buttons(results):
     """Render batch analysis download buttons."""
@@ -399,6 +395,7 @@ def create_pdf_zip(results, temp_dir):
     """Create a ZIP file containing PDFs for all analysis results."""
     zip_path = os.path.join(temp_dir, "token_analysis_pdfs.zip")
     pdf_files = []
+    review_date = datetime.now().strftime("%Y-%m-%d")
     
     try:
         # First generate all PDFs
@@ -411,7 +408,7 @@ def create_pdf_zip(results, temp_dir):
                         continue
                         
                     # Generate PDF
-                    pdf_path = create_pdf(result, temp_dir)
+                    pdf_path = create_pdf(result, temp_dir, review_date)
                     if pdf_path and os.path.exists(pdf_path):
                         pdf_files.append(pdf_path)
                     else:
@@ -537,16 +534,13 @@ def display_analysis_results(result_dict):
                 use_container_width=True
             )
         with download_col2:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                pdf_path = create_pdf(result_dict, temp_dir)
-                with open(pdf_path, "rb") as pdf_file:
-                    st.download_button(
-                        "Download PDF",
-                        data=pdf_file.read(),
-                        file_name=f"token_analysis_{st.session_state.token_address}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
+            st.download_button(
+                "Download PDF",
+                data=create_pdf_bytes(result_dict),
+                file_name=f"token_analysis_{st.session_state.token_address}.pdf",
+                mime="application/pdf",
+                use_container_width=True
+            )
         st.markdown("</div>", unsafe_allow_html=True)
     
     with col2:
@@ -645,7 +639,7 @@ def process_batch_analysis(addresses, batch_reviewer_name, batch_confirmation_st
 async def process_batch_tokens(addresses, progress_bar, status_text,
                              batch_reviewer_name, batch_confirmation_status):
     """Process multiple tokens concurrently with progress updates."""
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         results = []
         for i, address in enumerate(addresses, 1):
             result, _ = await get_token_details_async(address, session)
@@ -1,7 +1,6 @@
 import argparse
 import asyncio
-import aiohttp
-from spl_token_analysis import get_token_details_async, process_tokens_concurrently
+from spl_token_analysis import create_session, get_token_details_async, process_tokens_concurrently
 from spl_report_generator import create_pdf
 import os
 import json
@@ -12,11 +11,12 @@ async def generate_single_report(token_address: str, output_dir: str = None):
     if not output_dir:
         output_dir = os.getcwd()
     
-    async with aiohttp.ClientSession() as session:
-        token_details, _ = await get_token_details_async(token_address, session)
+    async with create_session() as session:
+        token_details, owner_program = await get_token_details_async(token_address, session)
         
-        if isinstance(token_details, str):
-            print(f"Error: {token_details}")
+        # Failed lookups come back without an owner program
+        if owner_program is None:
+            print(f"Error: failed to fetch token details for {token_address}")
             return
             
         result_dict = token_details.to_dict()
@@ -40,11 +40,13 @@ async def generate_batch_reports(input_file: str, output_dir: str = None):
             
         print(f"\nProcessing {len(token_addresses)} tokens...")
         
-        async with aiohttp.ClientSession() as session:
+        async with create_session() as session:
             results = await process_tokens_concurrently(token_addresses, session)
             
-            # Generate timestamp for batch processing
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # Generate timestamp and report date once for the whole batch
+            started = datetime.now()
+            timestamp = started.strftime("%Y%m%d_%H%M%S")
+            review_date = started.strftime("%Y-%m-%d")
             
             # Save JSON results
             json_output = f"batch_results_{timestamp}.json"
@@ -58,7 +60,7 @@ async def generate_batch_reports(input_file: str, output_dir: str = None):
                     result_dict['reviewer_name'] = 'SPL-AUTOMATION'
                     result_dict['confirmation_status'] = 'Confirmed'
                     try:
-                        pdf_path = create_pdf(result_dict, output_dir)
+                        pdf_path = create_pdf(result_dict, output_dir, review_date)
                         print(f"Generated report: {pdf_path}")
                     except Exception as e:
                         print(f"Error generating PDF for {result['address']}: {e}")
@@ -1,3 +1,4 @@
+import io
 import os
 import json
 from datetime import datetime
@@ -7,11 +8,48 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Frame, PageTemplate
 from reportlab.pdfgen import canvas
-from typing import Dict
 import re
 
+# Row labels of the basic metadata table, drawn as plain table text
+_METADATA_LABELS = ("Reviewer", "Profile", "Review Date", "Network", "Address")
+
+# Mitigable checks as (title, token data key, description, assessment field name);
+# mitigations are recorded under the token data key
+_TOKEN_CHECKS = (
+    ("No Freeze Authority",
+     'freeze_authority',
+     "A missing freeze authority means that it is set to null and therefore a permanently revoked privilege. This means that account blacklisting is not possible.",
+     'freeze_authority'),
+)
+
+# Token 2022 mints run the standard checks plus the extension checks
+_TOKEN_2022_CHECKS = _TOKEN_CHECKS + (
+    ("No Permanent Delegate",
+     'permanent_delegate',
+     "A missing Permanent Delegate means that it is set to null and therefore no delegate can burn or transfer any amount of tokens.",
+     'permanent_delegate'),
+    
+    ("No Transfer Hook",
+     'transfer_hook',
+     "A missing TransferHook means that it is set to null and therefore does not communicate with a custom program whenever this token is transferred.",
+     'transfer_hook'),
+    
+    ("No Confidential Transfers",
+     'confidential_transfers',
+     "The confidential transfer is a non-anonymous, non-private transfer that publicly shares the source, destination, and token type, but uses zero-knowledge proofs to encrypt the amount of the transfer.",
+     'confidential_transfers'),
+    
+    ("No Transaction Fees",
+     'transaction_fees',
+     "Transaction fees are set to 0 and therefore no transaction fees are possible and send/receive token amounts are the same as expected.",
+     'transfer_fees'),
+)
+
 class TokenReportStyles:
     """Container for all report styles"""
+    __slots__ = ('styles', 'title', 'cell', 'context', 'header', 'risk_header',
+                 'risk_subheader', 'risk_body', 'conflicts', 'security', '_security_styles')
+
     def __init__(self):
         self.styles = getSampleStyleSheet()
         self._create_styles()
@@ -120,20 +158,31 @@ class TokenReportStyles:
         )
     
     def _create_security_style(self):
-        return lambda status: ParagraphStyle(
-            'SecurityCell',
-            parent=self.cell,
-            textColor=colors.HexColor('#006400') if status == 'PASSED'
-                     else colors.red if status == 'FAILED'
-                     else colors.black,
-            fontName='Helvetica-Bold'
-        )
+        self._security_styles = {
+            status: ParagraphStyle(
+                'SecurityCell',
+                parent=self.cell,
+                textColor=color,
+                fontName='Helvetica-Bold'
+            )
+            for status, color in (
+                ('PASSED', colors.HexColor('#006400')),
+                ('FAILED', colors.red),
+                (None, colors.black)
+            )
+        }
+        return lambda status: self._security_styles.get(status, self._security_styles[None])
 
 class TokenReportGenerator:
     """Handles generation of token security assessment reports"""
-    def __init__(self, token_data, output_dir):
+    __slots__ = ('token_data', 'output_dir', 'styles', 'elements', 'token_name',
+                 'token_symbol', 'security_review', 'is_token_2022', '_mitigations', 'review_date')
+
+    def __init__(self, token_data, output_dir, review_date=None):
         self.token_data = token_data
         self.output_dir = output_dir
+        # Batches pass one preformatted date shared by every report
+        self.review_date = review_date or datetime.now().strftime("%Y-%m-%d")
         self.styles = TokenReportStyles()
         self.elements = []
         
@@ -142,20 +191,26 @@ class TokenReportGenerator:
         self.token_symbol = self._get_valid_value(token_data.get('symbol'), 'UNKNOWN')
         self.security_review = self._get_valid_value(token_data.get('security_review'), 'UNKNOWN')
         self.is_token_2022 = "Token 2022" in token_data.get('owner_program', '')
+        self._mitigations = token_data.get('mitigations') or {}
     
     @staticmethod
     def _get_valid_value(value, default):
         """Return valid value or default if value is invalid"""
         return default if value in ['N/A', None, ''] else value
     
-    def _create_document(self):
-        """Create and configure the PDF document"""
+    def _cell(self, value):
+        """Wrap a variable-length value in a Paragraph so it wraps within its column"""
+        return Paragraph(value, self.styles.cell)
+    
+    def _get_filename(self):
+        """Return the sanitized report file name"""
         filename = f"{self.token_name} ({self.token_symbol}) Security Memo.pdf"
-        filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_', '(', ')', '.'))
-        filepath = os.path.join(self.output_dir, filename)
-        
+        return "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_', '(', ')', '.'))
+    
+    def _create_document(self, target):
+        """Create and configure the PDF document writing to the given file-like object"""
         doc = SimpleDocTemplate(
-            filepath,
+            target,
             pagesize=letter,
             leftMargin=72,
             rightMargin=72,
@@ -167,7 +222,7 @@ class TokenReportGenerator:
         template = PageTemplate(id='main', frames=frame, onPage=self._create_header)
         doc.addPageTemplates([template])
         
-        return doc, filepath
+        return doc
     
     @staticmethod
     def _create_header(canvas, doc):
@@ -222,19 +277,18 @@ class TokenReportGenerator:
     
     def _add_metadata(self):
         """Add basic metadata table"""
-        current_date = datetime.now().strftime("%Y-%m-%d")
         profile = "SPL Token 2022 Standard" if self.is_token_2022 else "SPL Token Standard"
         
-        metadata = [
-            ["Reviewer", self.token_data.get('reviewer_name', 'Noama Samreen')],
-            ["Profile", profile],
-            ["Review Date", current_date],
-            ["Network", "Solana"],
-            ["Address", self.token_data['address']]
-        ]
+        values = (
+            self.token_data.get('reviewer_name', 'Noama Samreen'),
+            profile,
+            self.review_date,
+            "Solana",
+            self.token_data['address']
+        )
         
-        metadata_data = [[Paragraph(k, self.styles.cell), Paragraph(v, self.styles.cell)] 
-                        for k, v in metadata]
+        # Constant labels are drawn as plain table text, values wrap as Paragraphs
+        metadata_data = [[label, self._cell(v)] for label, v in zip(_METADATA_LABELS, values)]
         
         self.elements.extend([
             self._create_basic_table(metadata_data),
@@ -246,10 +300,10 @@ class TokenReportGenerator:
         conflicts_text = """<b>Conflicts Certification:</b> To the best of your knowledge, please confirm that you and your immediate family: (1) have not invested more than $10,000 in the asset or its issuer, (2) do not own more than 1% of the asset outstanding, and (3) do not have a personal relationship with the issuer's management, governing body, or owners. For wrapped assets, the underlying asset must be considered for the purpose of this conflict certification, unless: 1) the asset is a stablecoin; or 2) has a market cap of over $100 billion dollars. For multi-chain assets every version of the multi-chain asset must be counted together for the purpose of this conflict certification."""
         
         reviewer_confirmation = [[
-            Paragraph("Reviewer:", self.styles.cell),
-            Paragraph(self.token_data.get('reviewer_name', 'Noama Samreen'), self.styles.cell),
-            Paragraph("Status:", self.styles.cell),
-            Paragraph(self.token_data.get('confirmation_status', 'Confirmed'), self.styles.cell)
+            "Reviewer:",
+            self._cell(self.token_data.get('reviewer_name', 'Noama Samreen')),
+            "Status:",
+            self._cell(self.token_data.get('confirmation_status', 'Confirmed'))
         ]]
         
         reviewer_table = Table(reviewer_confirmation, colWidths=[1*inch, 2*inch, 1*inch, 2*inch])
@@ -287,34 +341,10 @@ trusted Token Program"""
             Spacer(1, 25)
         ])
     
-    def _add_recommendation(self):
+    def _add_recommendation(self, checks):
         """Add recommendation section with risk scores"""
-        mitigations = self.token_data.get('mitigations', {})
-        all_mitigations_applied = all(
-            m.get('applied', False) 
-            for m in mitigations.values()
-        )
-        
-        # Calculate risk score based on the highest risk level
-        risk_score = 1  # Default to lowest risk
-        
-        # Check for freeze authority
-        if self.token_data.get('freeze_authority'):
-            if mitigations.get('freeze_authority', {}).get('applied', False):
-                risk_score = max(risk_score, 4)  # Mitigated
-            else:
-                risk_score = 5  # Failed
-        
-        # Check Token 2022 specific features
-        if self.is_token_2022:
-            for feature in ['permanent_delegate', 'transfer_hook', 'confidential_transfers', 'transaction_fees']:
-                value = getattr(self.token_data.get('extensions', {}), feature, None)
-                if value not in [None, 0, 'None']:
-                    if mitigations.get(feature, {}).get('applied', False):
-                        risk_score = max(risk_score, 4)  # Mitigated
-                    else:
-                        risk_score = 5  # Failed
-                        break
+        # Risk score is the highest score across all evaluated checks
+        risk_score = max((check[3] for check in checks), default=1)
         
         recommendation = (
             f"<b>{self.token_name} ({self.token_symbol}) "
@@ -353,13 +383,14 @@ trusted Token Program"""
             if isinstance(value, bool):
                 value = str(value)
             display_name = field.replace('_', ' ').title()
+            # Values keep their Paragraph so long program ids still wrap in the column
             data.append([
-                Paragraph(display_name, self.styles.cell),
-                Paragraph(str(value), self.styles.cell)
+                display_name,
+                self._cell(str(value))
             ])
         
         data.append([
-            Paragraph("Security Review", self.styles.cell),
+            "Security Review",
             Paragraph(self.security_review, self.styles.security(self.security_review))
         ])
         
@@ -368,17 +399,14 @@ trusted Token Program"""
             Spacer(1, 30)
         ])
     
-    def _add_risk_findings(self):
+    def _add_risk_findings(self, checks):
         """Add risk findings section"""
         self.elements.append(Paragraph("Risk Findings", self.styles.risk_header))
         
-        # Add standard checks
+        # Add standard check followed by the freeze authority and Token 2022 checks
         self._add_standard_spl_check()
-        self._add_freeze_authority_check()
-        
-        # Add Token 2022 specific checks
-        if self.is_token_2022:
-            self._add_token_2022_checks()
+        for check in checks:
+            self._add_check_section(*check)
     
     def _add_standard_spl_check(self):
         """Add standard SPL token check"""
@@ -402,21 +430,33 @@ trusted Token Program"""
             Spacer(1, 8)
         ])
     
-    def _add_check_section(self, title, value, description, field_name):
-        """Add a generic check section"""
-        has_no_value = value in [None, 'None', '', '0', 0]
-        mitigation_applied = self.token_data.get('mitigations', {}).get(field_name, {}).get('applied', False)
+    def _compute_checks(self):
+        """Evaluate all mitigable checks in a single pass over the token data
         
-        if has_no_value:
-            status = 'Pass'
-            score = '1'
-        elif mitigation_applied:
-            status = 'Mitigated'
-            score = '4'
-        else:
-            status = 'Fail'
-            score = '5'
+        Returns a list of (title, value, status, score, description, field_name,
+        mitigation_doc) tuples shared by the recommendation and risk findings sections.
+        """
+        checks = _TOKEN_2022_CHECKS if self.is_token_2022 else _TOKEN_CHECKS
         
+        results = []
+        for title, data_key, description, field_name in checks:
+            value = self.token_data.get(data_key)
+            mitigation = self._mitigations.get(data_key) or {}
+            mitigation_doc = None
+            
+            if value in [None, 'None', '', '0', 0]:
+                status, score = 'Pass', 1
+            elif mitigation.get('applied', False):
+                status, score = 'Mitigated', 4
+                mitigation_doc = mitigation.get('documentation', '')
+            else:
+                status, score = 'Fail', 5
+            
+            results.append((title, value, status, score, description, field_name, mitigation_doc))
+        return results
+    
+    def _add_check_section(self, title, value, status, score, description, field_name, mitigation_doc):
+        """Add a generic check section"""
         self.elements.extend([
             Paragraph(f"{score} | {title} - {status}", self.styles.risk_subheader),
             Paragraph(description, self.styles.risk_body),
@@ -427,146 +467,54 @@ trusted Token Program"""
             Paragraph("<b>Mitigations:</b>", self.styles.risk_body)
         ])
         
-        if not has_no_value and field_name in self.token_data.get('mitigations', {}):
-            mitigation = self.token_data['mitigations'][field_name]
-            if mitigation['applied']:
-                # Convert markdown links to ReportLab link format
-                doc_text = mitigation['documentation']
-                # Replace markdown links with ReportLab link format
-                doc_text = re.sub(
-                    r'\[(.*?)\]\((https?://[^\s\)]+)\)',
-                    r'<a href="\2" color="blue"><u>\1</u></a>',
-                    doc_text
-                )
-                self.elements.append(Paragraph(doc_text, self.styles.risk_body))
+        if mitigation_doc is not None:
+            # Replace markdown links with ReportLab link format
+            doc_text = re.sub(
+                r'\[(.*?)\]\((https?://[^\s\)]+)\)',
+                r'<a href="\2" color="blue"><u>\1</u></a>',
+                mitigation_doc
+            )
+            self.elements.append(Paragraph(doc_text, self.styles.risk_body))
         else:
             self.elements.append(Paragraph("N/A", self.styles.risk_body))
     
-    def _add_freeze_authority_check(self):
-        """Add freeze authority check section"""
-        self._add_check_section(
-            "No Freeze Authority",
-            self.token_data.get('freeze_authority'),
-            "A missing freeze authority means that it is set to null and therefore a permanently revoked privilege. This means that account blacklisting is not possible.",
-            'freeze_authority'
-        )
-    
-    def _add_token_2022_checks(self):
-        """Add Token-2022 specific checks"""
-        checks = [
-            ("No Permanent Delegate",
-             self.token_data.get('permanent_delegate'),
-             "A missing Permanent Delegate means that it is set to null and therefore no delegate can burn or transfer any amount of tokens.",
-             'permanent_delegate'),
-            
-            ("No Transfer Hook",
-             self.token_data.get('transfer_hook'),
-             "A missing TransferHook means that it is set to null and therefore does not communicate with a custom program whenever this token is transferred.",
-             'transfer_hook'),
-            
-            ("No Confidential Transfers",
-             self.token_data.get('confidential_transfers'),
-             "The confidential transfer is a non-anonymous, non-private transfer that publicly shares the source, destination, and token type, but uses zero-knowledge proofs to encrypt the amount of the transfer.",
-             'confidential_transfers'),
-            
-            ("No Transaction Fees",
-             self.token_data.get('transaction_fees'),
-             "Transaction fees are set to 0 and therefore no transaction fees are possible and send/receive token amounts are the same as expected.",
-             'transfer_fees')
-        ]
-        
-        for title, value, description, field_name in checks:
-            self._add_check_section(title, value, description, field_name)
-    
-    def generate(self):
-        """Generate the complete PDF report"""
-        doc, filepath = self._create_document()
+    def generate_bytes(self):
+        """Generate the complete PDF report in memory and return its bytes"""
+        buffer = io.BytesIO()
+        doc = self._create_document(buffer)
         
         # Build report structure
+        self.elements = []
+        checks = self._compute_checks()
         self._add_title()
         self._add_metadata()
         self._add_conflicts_certification()
         self._add_context()
-        self._add_recommendation()
+        self._add_recommendation(checks)
         self._add_token_details()
-        self._add_risk_findings()
+        self._add_risk_findings(checks)
         
         # Build PDF
         doc.build(self.elements)
+        return buffer.getvalue()
+    
+    def generate(self):
+        """Generate the complete PDF report and write it to the output directory"""
+        filepath = os.path.join(self.output_dir, self._get_filename())
+        pdf_bytes = self.generate_bytes()
+        with open(filepath, 'wb') as f:
+            f.write(pdf_bytes)
         return filepath
 
-def create_pdf(token_data, output_dir):
-    """Create a PDF report for the given token data"""
-    generator = TokenReportGenerator(token_data, output_dir)
+def create_pdf(token_data, output_dir, review_date=None):
+    """Create a PDF report for the given token data, dated review_date (YYYY-MM-DD, defaults to today)"""
+    generator = TokenReportGenerator(token_data, output_dir, review_date)
     return generator.generate()
 
-# Export the function
-__all__ = ['create_pdf']
+def create_pdf_bytes(token_data, review_date=None):
+    """Create a PDF report for the given token data and return it as bytes"""
+    generator = TokenReportGenerator(token_data, None, review_date)
+    return generator.generate_bytes()
 
-if __name__ == '__main__':
-    pdf_path = create_pdf(token_data, output_dir)
-
-def to_dict(self) -> Dict:
-    result = {
-        'name': self.token_name,
-        'symbol': self.token_symbol,
-        'address': self.address,
-        'owner_program': self.owner_program,
-        'freeze_authority': self.freeze_authority,
-        'update_authority': (f"{self.update_authority} (Pump.Fun Mint Authority)" 
-                           if self.update_authority == "TSLvdd1pWpHVjahSpsvCXUbgwsL3JAcvokwaKt1eokM" 
-                           else self.update_authority)
-    }
-    
-    if self.extensions:
-        result.update({
-            'permanent_delegate': self.extensions.permanent_delegate,
-            'transaction_fees': self.extensions.transfer_fee,
-            'transfer_hook': self.extensions.transfer_hook_authority,
-            'confidential_transfers': self.extensions.confidential_transfers_authority,
-        })
-    
-    if self.update_authority == "TSLvdd1pWpHVjahSpsvCXUbgwsL3JAcvokwaKt1eokM":
-        result['is_genuine_pump_fun_token'] = self.is_genuine_pump_fun_token
-        result['token_graduated_to_raydium'] = self.token_graduated_to_raydium
-        if self.is_genuine_pump_fun_token and self.interacted_with:
-            result['interacted_with'] = self.interacted_with
-            result['interacting_account'] = self.interacting_account
-            result['interaction_signature'] = self.interaction_signature
-    
-    # Add mitigations to result
-    result['mitigations'] = {
-        check: {
-            'documentation': mitigation.documentation,
-            'applied': mitigation.applied
-        }
-        for check, mitigation in self.mitigations.items()
-    }
-    
-    # Calculate security review status based on risk score
-    risk_score = 1  # Default to lowest risk
-    
-    # Check for freeze authority
-    if self.freeze_authority:
-        if self.mitigations.get('freeze_authority', {}).get('applied', False):
-            risk_score = max(risk_score, 4)  # Mitigated
-        else:
-            risk_score = 5  # Failed
-    
-    # Check Token 2022 specific features if present
-    if self.extensions:
-        for feature, value in {
-            'permanent_delegate': self.extensions.permanent_delegate,
-            'transfer_hook': self.extensions.transfer_hook_authority,
-            'confidential_transfers': self.extensions.confidential_transfers_authority,
-            'transfer_fees': self.extensions.transfer_fee
-        }.items():
-            if value not in [None, 0, 'None']:
-                if self.mitigations.get(feature, {}).get('applied', False):
-                    risk_score = max(risk_score, 4)  # Mitigated
-                else:
-                    risk_score = 5  # Failed
-                    break
-    
-    result['security_review'] = 'PASSED' if risk_score < 5 else 'FAILED'
-    return result
+# Export the functions
+__all__ = ['create_pdf', 'create_pdf_bytes']
@@ -1,8 +1,9 @@
 # Copyright 2025 noamasamreen
 
 from dataclasses import dataclass, field
-from typing import Dict, Optional, Tuple, Any, List
+from typing import Dict, Optional, Tuple, Any, List, AsyncIterable, AsyncIterator, Iterable, Union
 import base64
+import struct
 from functools import lru_cache
 import asyncio
 import aiohttp
@@ -10,56 +11,171 @@ import logging
 import json
 from solders.pubkey import Pubkey as PublicKey
 import time
+from collections import OrderedDict
 from asyncio import sleep
+from itertools import chain
 
 # Constants
 SOLANA_RPC_URL = "https://api.mainnet-beta.solana.com"
 TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
 TOKEN_2022_PROGRAM = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
 METADATA_PROGRAM_ID = "metaqbxxUerdq28cj1RbAWkYQm3ybzjb6a8bt518x1s"
+PUMP_PROGRAM = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
+PUMP_UPDATE_AUTHORITY = "TSLvdd1pWpHVjahSpsvCXUbgwsL3JAcvokwaKt1eokM"
+RAYDIUM_AMM_PROGRAM = "EhhTKJ6M13fa4jc281HpdyiNpAHj8uvxymgZqGuDs9Jj"
+RAYDIUM_BASE_URL = "https://api-v3.raydium.io"
+RAYDIUM_MINT_INFO_URL = f"{RAYDIUM_BASE_URL}/mint/ids?mints="
+MAX_NAME_LENGTH = 32  # Metaplex limits, in bytes
+MAX_SYMBOL_LENGTH = 10
+# Metadata bytes needed for the update authority, name and symbol:
+# key, update authority, mint, then the length-prefixed name and symbol
+METADATA_PREFIX_LENGTH = 1 + 32 + 32 + 4 + MAX_NAME_LENGTH + 4 + MAX_SYMBOL_LENGTH
 MAX_RETRIES = 4
-BASE_DELAY = 2.0  # 2 second between requests
 RETRY_DELAY = 2.0  # Additional delay when rate limited
+MAX_MULTIPLE_ACCOUNTS = 100  # getMultipleAccounts accepts at most 100 pubkeys
+RPC_RATE_LIMIT = 10  # Requests per second allowed against the RPC endpoint
+TOKEN_CACHE_TTL = 120.0  # Seconds fetched token details are reused for
+TOKEN_CACHE_SIZE = 1024  # Most token details kept in the cache at once
 
-# Original constants
-CONCURRENT_LIMIT = 1  # Back to original value
+# Connection settings
+CONCURRENT_LIMIT = 32  # Tokens processed at once, paced by the RPC rate limit
+CONNECTION_LIMIT = 64
+CONNECTION_LIMIT_PER_HOST = 10
+KEEPALIVE_TIMEOUT = 75  # Seconds idle connections are kept open for reuse
+DNS_CACHE_TTL = 300  # Seconds resolved RPC and Raydium host addresses are cached
 SESSION_TIMEOUT = aiohttp.ClientTimeout(total=30)
 
+# Parsed metadata program id, reused for every PDA derivation
+_METADATA_PROGRAM_PUBKEY = PublicKey.from_string(METADATA_PROGRAM_ID)
+_METADATA_PROGRAM_BYTES = bytes(_METADATA_PROGRAM_PUBKEY)
+
+# Little-endian u32 reader for Borsh string length prefixes
+_U32LE = struct.Struct("<I").unpack_from
+
+# Membership sets for hot-path checks
+_TOKEN_PROGRAMS = frozenset((TOKEN_PROGRAM, TOKEN_2022_PROGRAM))
+_UNSET_VALUES = frozenset((None, 0, 'None'))
+_ZERO_FEES = frozenset((None, 0))
+
+# Shared JSON-RPC request options, only ever read when a payload is serialized
+_METADATA_INFO_OPTS = {
+    "encoding": "base64",
+    "dataSlice": {"offset": 0, "length": METADATA_PREFIX_LENGTH}
+}
+# Base64 characters covering the metadata prefix, in case the RPC ignores dataSlice
+_METADATA_PREFIX_CHARS = (METADATA_PREFIX_LENGTH + 2) // 3 * 4
+_MINT_INFO_OPTS = {"encoding": "jsonParsed"}
+# Only the owner is needed, so skip parsing and transferring account data
+_OWNER_ONLY_OPTS = {
+    "encoding": "base64",
+    "dataSlice": {"offset": 0, "length": 0},
+    "commitment": "confirmed"
+}
+_SIGNATURES_OPTS = {"limit": 3, "commitment": "confirmed"}
+_TRANSACTION_OPTS = {
+    "encoding": "jsonParsed",
+    "maxSupportedTransactionVersion": 0,
+    "commitment": "confirmed"
+}
+
 OWNER_LABELS = {
     TOKEN_PROGRAM: "Token Program",
     TOKEN_2022_PROGRAM: "Token 2022 Program"
 }
 
+class RateLimiter:
+    """Async context manager spacing entries to at most max_rate per time_period seconds"""
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        self._interval = time_period / max_rate
+        self._next_slot = 0.0
+
+    async def __aenter__(self):
+        # Reserve the next free slot synchronously so the limiter is safe to
+        # share between coroutines and event loops without a lock
+        now = time.monotonic()
+        slot = max(self._next_slot, now)
+        self._next_slot = slot + self._interval
+        if slot > now:
+            await sleep(slot - now)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+RPC_LIMITER = RateLimiter(RPC_RATE_LIMIT)
+
+def create_session() -> aiohttp.ClientSession:
+    """Create a client session with a pooled connector for RPC requests"""
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        enable_cleanup_closed=True
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=SESSION_TIMEOUT)
+
+@lru_cache(maxsize=4096)
+def _derive_metadata_account(mint_address: str) -> Tuple[PublicKey, int]:
+    """Cached helper deriving the metadata PDA, which only depends on the mint"""
+    mint_pubkey = PublicKey.from_string(mint_address)
+    
+    seeds = [
+        b"metadata",
+        _METADATA_PROGRAM_BYTES,
+        bytes(mint_pubkey)
+    ]
+    
+    return PublicKey.find_program_address(
+        seeds,
+        _METADATA_PROGRAM_PUBKEY
+    )
+
+@lru_cache(maxsize=4096)
+def _bytes_to_base58(key_bytes: bytes) -> str:
+    """Cached base58 encoding of a raw 32 byte public key"""
+    return str(PublicKey(key_bytes))
+
+async def _rpc(session: aiohttp.ClientSession, payload: Dict) -> Tuple[int, Optional[Dict]]:
+    """POST a JSON-RPC payload to the Solana RPC, returning the HTTP status and decoded body
+
+    Rate limited (429) requests are retried with exponential backoff.
+    """
+    for retry in range(MAX_RETRIES):
+        async with RPC_LIMITER, session.post(SOLANA_RPC_URL, json=payload) as response:
+            if response.status == 200:
+                return response.status, json.loads(await response.read())
+            if response.status != 429 or retry == MAX_RETRIES - 1:
+                return response.status, None
+        wait_time = RETRY_DELAY * (2 ** retry)  # Exponential backoff
+        logging.warning("Rate limit hit in %s, waiting %s seconds...", payload["method"], wait_time)
+        await sleep(wait_time)
+
 async def get_metadata_account(mint_address: str) -> Tuple[PublicKey, int]:
     """Derive the metadata account address for a mint"""
     try:
-        metadata_program_id = PublicKey.from_string(METADATA_PROGRAM_ID)
-        mint_pubkey = PublicKey.from_string(mint_address)
-        
-        seeds = [
-            b"metadata",
-            bytes(metadata_program_id),
-            bytes(mint_pubkey)
-        ]
-        
-        return PublicKey.find_program_address(
-            seeds,
-            metadata_program_id
-        )
+        return _derive_metadata_account(mint_address)
     except Exception as e:
-        logging.error(f"Error deriving metadata account: {e}")
+        logging.error("Error deriving metadata account: %s", e)
         return None, None
 
+def _read_metadata_string(data: bytes, offset: int, max_length: int) -> Tuple[str, int]:
+    """Read a Borsh string from metadata account data, returning the text and the next offset"""
+    length = _U32LE(data, offset)[0]
+    start = offset + 4
+    end = start + length
+    if length > max_length or end > len(data):
+        raise ValueError(f"Invalid string length {length} at offset {offset}")
+    # Metaplex pads strings with NUL bytes up to their maximum length
+    text = data[start:end].split(b'\x00', 1)[0].decode('utf-8', 'replace')
+    return text or "N/A", end
+
 async def get_metadata(session: aiohttp.ClientSession, mint_address: str) -> Optional[Dict]:
     """Fetch metadata for a token with more conservative retry logic"""
     for retry in range(MAX_RETRIES):
         try:
-            # Add base delay before every request
-            await sleep(BASE_DELAY)
-            
             metadata_address, _ = await get_metadata_account(mint_address)
             if not metadata_address:
-                logging.warning(f"Could not derive metadata address for {mint_address}")
+                logging.warning("Could not derive metadata address for %s", mint_address)
                 return None
 
             payload = {
@@ -68,97 +184,75 @@ async def get_metadata(session: aiohttp.ClientSession, mint_address: str) -> Opt
                 "method": "getAccountInfo",
                 "params": [
                     str(metadata_address),
-                    {"encoding": "base64"}
+                    _METADATA_INFO_OPTS
                 ]
             }
             
-            async with session.post(SOLANA_RPC_URL, json=payload) as response:
-                if response.status == 429:  # Rate limit hit
-                    if retry < MAX_RETRIES - 1:
-                        wait_time = RETRY_DELAY * (2 ** retry)  # Exponential backoff
-                        logging.warning(f"Rate limit hit in metadata fetch, waiting {wait_time} seconds...")
-                        await sleep(wait_time)
-                        continue
-                    return None
-                    
-                if response.status != 200:
-                    logging.warning(f"Non-200 status code: {response.status}")
-                    return None
-                    
-                data = await response.json()
-                if "result" not in data or not data["result"] or not data["result"]["value"]:
-                    logging.warning("No metadata data returned from RPC")
-                    return None
-
-                # Parse the metadata account data
-                account_data = data["result"]["value"]["data"][0]
-                decoded_data = base64.b64decode(account_data)
+            status, data = await _rpc(session, payload)
+            if status != 200:
+                logging.warning("Non-200 status code: %s", status)
+                return None
                 
-                if len(decoded_data) < 8:  # Ensure we have enough data
-                    logging.warning("Metadata data too short")
-                    return None
-                    
-                try:
-                    # Skip the first byte (discriminator)
-                    offset = 1
-                    
-                    # Read update authority (32 bytes)
-                    update_authority = str(PublicKey(decoded_data[offset:offset + 32]))
-                    offset += 32
-                    
-                    # Skip mint address (32 bytes)
-                    offset += 32
-                    
-                    # Read name length and name
-                    name_length = int.from_bytes(decoded_data[offset:offset + 4], byteorder='little')
-                    offset += 4
-                    if name_length > 0:
-                        name = decoded_data[offset:offset + name_length].decode('utf-8').rstrip('\x00')
-                    else:
-                        name = "N/A"
-                    offset += name_length
-                    
-                    # Read symbol length and symbol
-                    symbol_length = int.from_bytes(decoded_data[offset:offset + 4], byteorder='little')
-                    offset += 4
-                    if symbol_length > 0:
-                        symbol = decoded_data[offset:offset + symbol_length].decode('utf-8').rstrip('\x00')
-                    else:
-                        symbol = "N/A"
-                    
-                    logging.info(f"Successfully parsed metadata - Name: {name}, Symbol: {symbol}")
-                    return {
-                        "name": name,
-                        "symbol": symbol,
-                        "update_authority": update_authority
-                    }
-                except UnicodeDecodeError as e:
-                    logging.error(f"Error decoding metadata strings: {e}")
-                    return None
-                except Exception as e:
-                    logging.error(f"Error parsing metadata: {e}")
-                    return None
+            if "result" not in data or not data["result"] or not data["result"]["value"]:
+                logging.warning("No metadata data returned from RPC")
+                return None
+
+            # Parse the metadata account data
+            account_data = data["result"]["value"]["data"][0]
+            decoded_data = base64.b64decode(account_data[:_METADATA_PREFIX_CHARS])
+            
+            if len(decoded_data) < 8:  # Ensure we have enough data
+                logging.warning("Metadata data too short")
+                return None
+                
+            try:
+                # Skip the first byte (discriminator)
+                offset = 1
+                
+                # Read update authority (32 bytes)
+                update_authority = _bytes_to_base58(decoded_data[offset:offset + 32])
+                offset += 32
+                
+                # Skip mint address (32 bytes)
+                offset += 32
                 
+                # Read name and symbol (length-prefixed, NUL padded strings)
+                name, offset = _read_metadata_string(decoded_data, offset, MAX_NAME_LENGTH)
+                symbol, offset = _read_metadata_string(decoded_data, offset, MAX_SYMBOL_LENGTH)
+                
+                logging.info("Successfully parsed metadata - Name: %s, Symbol: %s", name, symbol)
+                return {
+                    "name": name,
+                    "symbol": symbol,
+                    "update_authority": update_authority
+                }
+            except Exception as e:
+                logging.error("Error parsing metadata: %s", e)
+                return None
+
         except Exception as e:
             if retry < MAX_RETRIES - 1:
                 await sleep(RETRY_DELAY * (retry + 1))
                 continue
-            logging.error(f"Error fetching metadata: {str(e)}")
+            logging.error("Error fetching metadata: %s", e)
             return None
 
-@dataclass
+@dataclass(slots=True)
 class Token2022Extensions:
     permanent_delegate: Optional[str] = None
     transfer_fee: Optional[int] = None
     transfer_hook_authority: Optional[str] = None
     confidential_transfers_authority: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class MitigationDetails:
     documentation: str
     applied: bool = False
 
-@dataclass
+# Shared stand-in for checks that have no mitigation recorded
+_UNAPPLIED = MitigationDetails('', False)
+
+@dataclass(slots=True)
 class TokenDetails:
     name: str
     symbol: str
@@ -176,6 +270,7 @@ class TokenDetails:
     mitigations: Dict[str, MitigationDetails] = field(default_factory=dict)
 
     def to_dict(self) -> Dict:
+        is_pump = self.update_authority == PUMP_UPDATE_AUTHORITY
         result = {
             'name': self.name,
             'symbol': self.symbol,
@@ -183,7 +278,7 @@ class TokenDetails:
             'owner_program': self.owner_program,
             'freeze_authority': self.freeze_authority,
             'update_authority': (f"{self.update_authority} (Pump.Fun Mint Authority)" 
-                               if self.update_authority == "TSLvdd1pWpHVjahSpsvCXUbgwsL3JAcvokwaKt1eokM" 
+                               if is_pump 
                                else self.update_authority)
         }
         
@@ -195,7 +290,7 @@ class TokenDetails:
                 'confidential_transfers': self.extensions.confidential_transfers_authority,
             })
         
-        if self.update_authority == "TSLvdd1pWpHVjahSpsvCXUbgwsL3JAcvokwaKt1eokM":
+        if is_pump:
             result['is_genuine_pump_fun_token'] = self.is_genuine_pump_fun_token
             result['token_graduated_to_raydium'] = self.token_graduated_to_raydium
             if self.is_genuine_pump_fun_token and self.interacted_with:
@@ -212,32 +307,23 @@ class TokenDetails:
             for check, mitigation in self.mitigations.items()
         }
         
-        # Calculate security review status based on risk score
-        risk_score = 1  # Default to lowest risk
-        
-        # Check for freeze authority
-        if self.freeze_authority:
-            if self.mitigations.get('freeze_authority', MitigationDetails('')).applied:
-                risk_score = max(risk_score, 4)  # Mitigated
-            else:
-                risk_score = 5  # Failed
-        
-        # Check Token 2022 specific features if present
-        if self.extensions:
-            for feature, value in {
-                'permanent_delegate': self.extensions.permanent_delegate,
-                'transfer_hook': self.extensions.transfer_hook_authority,
-                'confidential_transfers': self.extensions.confidential_transfers_authority,
-                'transfer_fees': self.extensions.transfer_fee
-            }.items():
-                if value not in [None, 0, 'None']:
-                    if self.mitigations.get(feature, MitigationDetails('')).applied:
-                        risk_score = max(risk_score, 4)  # Mitigated
-                    else:
-                        risk_score = 5  # Failed
-                        break
+        # Security review fails on the first risk without an applied mitigation
+        mitigations = self.mitigations
+        ext = self.extensions
+        has_unmitigated_risks = bool(
+            (self.freeze_authority and not mitigations.get('freeze_authority', _UNAPPLIED).applied)
+            or (ext is not None and any(
+                value not in _UNSET_VALUES and not mitigations.get(feature, _UNAPPLIED).applied
+                for feature, value in (
+                    ('permanent_delegate', ext.permanent_delegate),
+                    ('transfer_hook', ext.transfer_hook_authority),
+                    ('confidential_transfers', ext.confidential_transfers_authority),
+                    ('transfer_fees', ext.transfer_fee)
+                )
+            ))
+        )
         
-        result['security_review'] = 'PASSED' if risk_score < 5 else 'FAILED'
+        result['security_review'] = 'FAILED' if has_unmitigated_risks else 'PASSED'
         return result
 
 @lru_cache(maxsize=100)
@@ -245,32 +331,45 @@ def get_owner_program_label(owner_address: str) -> str:
     """Cached helper function to get the label for owner program"""
     return OWNER_LABELS.get(owner_address, "Unknown Owner")
 
-async def verify_pump_token(session: aiohttp.ClientSession, token_address: str, metadata: Optional[dict] = None) -> Tuple[bool, Optional[str], Optional[str], Optional[str]]:
-    """Verify if token is a genuine pump.fun token using new criteria"""
-    PUMP_PROGRAM = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
-    RAYDIUM_AMM_PROGRAM = "EhhTKJ6M13fa4jc281HpdyiNpAHj8uvxymgZqGuDs9Jj"
-    PUMP_UPDATE_AUTHORITY = "TSLvdd1pWpHVjahSpsvCXUbgwsL3JAcvokwaKt1eokM"
-    
-    # Step 1: Check update authority
-    if not metadata or metadata.get("update_authority") != PUMP_UPDATE_AUTHORITY:
-        logging.info(f"Token {token_address} failed update authority check")
-        return False, None, None, None
-        # Continue to Step 3
-    
-    # Step 3: Check Raydium token list if no Pump.fun interaction found
-    #Moved step 3 before step 2 to optimize 
-    logging.info(f"Pump.fun Token Checks: Checking Raydium graduation status")
-    try:
-        await asyncio.sleep(1)
-        RAYDIUM_BASE_URL = "https://api-v3.raydium.io"
-        RAYDIUM_MINT_INFO_ENDPOINT = "/mint/ids"
+async def get_account_owners(session: aiohttp.ClientSession, pubkeys: List[str]) -> List[Optional[str]]:
+    """Fetch the owner program of each account using batched getMultipleAccounts requests"""
+    owners = []
+    for start in range(0, len(pubkeys), MAX_MULTIPLE_ACCOUNTS):
+        batch = pubkeys[start:start + MAX_MULTIPLE_ACCOUNTS]
+        params = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getMultipleAccounts",
+            "params": [
+                batch,
+                _OWNER_ONLY_OPTS
+            ]
+        }
+        try:
+            status, data = await _rpc(session, params)
+            if data is None:
+                logging.warning("Account owner lookup for %d accounts failed with status %s", len(batch), status)
+            result = data.get("result") if data else None
+            values = (result.get("value") if result else None) or []
+        except Exception as e:
+            logging.error("Error fetching account info for %d accounts: %s", len(batch), e)
+            values = []
         
-        async with session.get(f"{RAYDIUM_BASE_URL}{RAYDIUM_MINT_INFO_ENDPOINT}?mints={token_address}") as response:
+        # Missing or failed accounts have no owner
+        values = values + [None] * (len(batch) - len(values))
+        owners.extend(value.get('owner') if value else None for value in values)
+    return owners
+
+async def _check_raydium(session: aiohttp.ClientSession, token_address: str) -> Optional[bool]:
+    """Check whether the token graduated to Raydium, returning None if the API call failed"""
+    logging.info("Pump.fun Token Checks: Checking Raydium graduation status")
+    try:
+        async with session.get(RAYDIUM_MINT_INFO_URL + token_address) as response:
             if response.status != 200:
-                logging.error(f"Raydium API returned status {response.status}")
-                return False, None, None, None
+                logging.error("Raydium API returned status %s", response.status)
+                return None
                 
-            raydium_data = await response.json()
+            raydium_data = json.loads(await response.read())
             #logging.info(f"Raydium Token Info Response: {raydium_data}")
             
             # Check if response has data field and contains valid token info
@@ -280,17 +379,21 @@ async def verify_pump_token(session: aiohttp.ClientSession, token_address: str,
                 raydium_data["data"][0]):
                 
                 token_info = raydium_data["data"][0]
-                logging.info(f"Pump.fun Token Checks: Token found in Raydium - Name: {token_info.get('name')}, Symbol: {token_info.get('symbol')}")
-                return True, "raydium", None, None
-            else:
-                logging.info(f"Pump.fun Token Checks: Token not found in Raydium (not graduated)")
-                #return False, None, None, None
+                logging.info("Pump.fun Token Checks: Token found in Raydium - Name: %s, Symbol: %s", token_info.get('name'), token_info.get('symbol'))
+                return True
+            logging.info("Pump.fun Token Checks: Token not found in Raydium (not graduated)")
+            return False
     
     except Exception as e:
-        logging.error(f"Error checking Raydium API: {str(e)}")
-        return False, None, None, None        
+        logging.error("Error checking Raydium API: %s", e)
+        return None
 
-    # Step 2: Check recent transactions for Pump.fun interaction
+def _account_pubkey(account: Any) -> Optional[str]:
+    """Pubkey of a transaction account key, given either as a string or as a parsed account"""
+    return account if isinstance(account, str) else account.get('pubkey')
+
+async def _check_recent_txs(session: aiohttp.ClientSession, token_address: str) -> Tuple[bool, Optional[str], Optional[str], Optional[str]]:
+    """Check the token's recent transactions for a Pump.fun or Raydium AMM interaction"""
     try:
         params = {
             "jsonrpc": "2.0",
@@ -298,206 +401,165 @@ async def verify_pump_token(session: aiohttp.ClientSession, token_address: str,
             "method": "getSignaturesForAddress",
             "params": [
                 token_address,
-                {
-                    "limit": 3,
-                    "commitment": "confirmed"
-                }
+                _SIGNATURES_OPTS
             ]
         }
         
     
-        async with session.post(SOLANA_RPC_URL, json=params) as response:
-            data = await response.json()
-            if "result" not in data:
-                logging.warning(f"No transaction data found for token {token_address}")
-                # Continue to Step 3
-            else:
-                signatures = data["result"]
-                logging.info(f"Pump.fun Token Checks: Found recent transactions")
+        _, data = await _rpc(session, params)
+        if not data or "result" not in data:
+            logging.warning("No transaction data found for token %s", token_address)
+        else:
+            signatures = data["result"]
+            logging.info("Pump.fun Token Checks: Found recent transactions")
+            
+            # Check each transaction for Pump.fun interaction
+            for sig_info in signatures:
+                #logging.info(f"Checking transaction: {sig_info['signature']}")
+                tx_params = {
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "getTransaction",
+                    "params": [
+                        sig_info['signature'],
+                        _TRANSACTION_OPTS
+                    ]
+                }
+                _, tx_data = await _rpc(session, tx_params)
+                if not tx_data or not tx_data.get("result"):
+                    continue
+                    
+                # Collect every account referenced by the transaction
+                result = tx_data["result"]
+                meta = result.get("meta")
+                loaded = meta.get("loadedAddresses") if meta else None
+                transaction = result.get("transaction")
+                message = transaction.get("message") if transaction else None
+                accounts = chain(
+                    (loaded.get("writable") or ()) if loaded else (),
+                    (loaded.get("readonly") or ()) if loaded else (),
+                    # Loaded addresses are plain strings, only account keys need normalizing
+                    map(_account_pubkey, message.get("accountKeys") or ()) if message else ()
+                )
                 
-                # Check each transaction for Pump.fun interaction
-                for sig_info in signatures:
-                    #logging.info(f"Checking transaction: {sig_info['signature']}")
-                    tx_params = {
-                        "jsonrpc": "2.0",
-                        "id": 1,
-                        "method": "getTransaction",
-                        "params": [
-                            sig_info['signature'],
-                            {
-                                "encoding": "jsonParsed",
-                                "maxSupportedTransactionVersion": 0,
-                                "commitment": "confirmed"
-                            }
-                        ]
-                    }
-                    async with session.post(SOLANA_RPC_URL, json=tx_params) as tx_response:
-                        tx_data = await tx_response.json()
-                        if "result" not in tx_data or not tx_data["result"]:
-                            continue
-                            
-                        # Add detailed logging for debugging
-                        accounts = tx_data["result"].get("meta", {}).get("loadedAddresses", {}).get("writable", [])
-                        accounts.extend(tx_data["result"].get("meta", {}).get("loadedAddresses", {}).get("readonly", []))
-                        accounts.extend(tx_data["result"].get("transaction", {}).get("message", {}).get("accountKeys", []))
-                        
-                        #logging.info(f"\nDetailed Transaction Info for {sig_info['signature']}:")
-                        #logging.info("----------------------------------------")
-                        
-                        # Log all account details in the transaction and check for verification
-                        #logging.info("Account Details:")
-                        for idx, acc in enumerate(accounts):
-                            try:
-                                # Get account info for each address
-                                acc_pubkey = acc if isinstance(acc, str) else acc.get('pubkey')
-                                if not acc_pubkey:
-                                    continue
-
-                                acc_info_params = {
-                                    "jsonrpc": "2.0",
-                                    "id": 1,
-                                    "method": "getAccountInfo",
-                                    "params": [
-                                        acc_pubkey,
-                                        {
-                                            "encoding": "jsonParsed",
-                                            "commitment": "confirmed"
-                                        }
-                                    ]
-                                }
-                                await asyncio.sleep(1)
-                                async with session.post(SOLANA_RPC_URL, json=acc_info_params) as acc_response:
-                                    acc_data = await acc_response.json()
-                                    if "result" not in acc_data or acc_data["result"] is None:
-                                        #logging.info(f"No account info found for {acc_pubkey}")
-                                        continue
-                                        
-                                    acc_info = acc_data["result"].get("value")
-                                    if not acc_info:
-                                        #logging.info(f"No value in account info for {acc_pubkey}")
-                                        continue
-                                        
-                                    acc_owner = acc_info.get('owner')
-                                    #acc_program = acc_info.get('data', {}).get('program') if isinstance(acc_info.get('data'), dict) else None
-                                    
-                                    #logging.info(f"Account {idx}:")
-                                    #logging.info(f"  Pubkey: {acc_pubkey}")
-                                    #logging.info(f"  Owner: {acc_owner}")
-                                    #logging.info(f"  Program: {acc_program}")
-                                    #logging.info(f"  Data Program: {acc_info.get('data', {}).get('program') if isinstance(acc_info.get('data'), dict) else 'N/A'}")
-                                    #logging.info(f"  Signer: {acc.get('signer', False) if not isinstance(acc, str) else False}")
-                                    #logging.info(f"  Writable: {acc.get('writable', False) if not isinstance(acc, str) else False}")
-                                    #logging.info(f"  Raw Data: {acc_info}")  # Add this for debugging
-
-                                    # Check for verification during the initial fetch
-                                    if acc_owner == PUMP_PROGRAM:
-                                        logging.info(f"Found account {acc_pubkey} owned by Pump.fun program in tx {sig_info['signature']}")
-                                        return True, "pump.fun", acc_pubkey, sig_info['signature']
-
-                            except Exception as e:
-                                logging.error(f"Error fetching account info for account {idx}: {str(e)}")
-                                continue
-                        
-                        # Log instruction details
-                        instructions = tx_data["result"].get("transaction", {}).get("message", {}).get("instructions", [])
-                        #logging.info("\nInstruction Details:")
-                        #for idx, inst in enumerate(instructions):
-                        #    logging.info(f"Instruction {idx}:")
-                        #    logging.info(f"  Program ID: {inst.get('programId', 'N/A')}")
-                        #    logging.info(f"  Accounts: {inst.get('accounts', [])}")
-                        #    logging.info(f"  Data: {inst.get('data', 'N/A')}")
-                        
-                        #logging.info("----------------------------------------\n")
-                        
-                        # Now check each account's owner
-                        for acc in accounts:
-                            try:
-                                acc_pubkey = acc if isinstance(acc, str) else acc.get('pubkey')
-                                if not acc_pubkey:
-                                    continue
-                                    
-                                acc_info_params = {
-                                    "jsonrpc": "2.0",
-                                    "id": 1,
-                                    "method": "getAccountInfo",
-                                    "params": [acc_pubkey, {"encoding": "jsonParsed"}]
-                                }
-                                
-                                async with session.post(SOLANA_RPC_URL, json=acc_info_params) as acc_response:
-                                    acc_data = await acc_response.json()
-                                    if not acc_data.get("result", {}).get("value"):
-                                        continue
-                                        
-                                    acc_owner = acc_data.get("result", {}).get("value", {}).get("owner")
-                                    if not acc_owner:
-                                        continue
-                                    
-                                    if acc_owner == PUMP_PROGRAM:
-                                        logging.info(f"Found account {acc_pubkey} owned by Pump.fun program in tx {sig_info['signature']}")
-                                        return True, "pump.fun", acc_pubkey, sig_info['signature']
-                                    elif acc_owner == RAYDIUM_AMM_PROGRAM or acc_pubkey == RAYDIUM_AMM_PROGRAM:
-                                        logging.info(f"Found Raydium AMM interaction in tx {sig_info['signature']}")
-                                        return True, "raydium", acc_pubkey, sig_info['signature']
-                            except Exception as e:
-                                logging.error(f"Error checking account {acc_pubkey}: {str(e)}")
-                                continue
+                # Deduplicate the account pubkeys while keeping transaction order
+                pubkeys = [acc_pubkey for acc_pubkey in dict.fromkeys(accounts) if acc_pubkey]
+                owners = await get_account_owners(session, pubkeys)
                 
-                logging.info("Pump.fun Token Checks: No accounts owned by Pump.fun program found in recent transactions")
-    
+                # A Pump.fun owned account takes precedence over a Raydium AMM
+                # interaction, so remember the first Raydium match and keep scanning
+                raydium_account = None
+                for acc_pubkey, acc_owner in zip(pubkeys, owners):
+                    if acc_owner == PUMP_PROGRAM:
+                        logging.info("Found account %s owned by Pump.fun program in tx %s", acc_pubkey, sig_info['signature'])
+                        return True, "pump.fun", acc_pubkey, sig_info['signature']
+                    if (raydium_account is None and acc_owner and
+                            (acc_owner == RAYDIUM_AMM_PROGRAM or acc_pubkey == RAYDIUM_AMM_PROGRAM)):
+                        raydium_account = acc_pubkey
+                
+                if raydium_account is not None:
+                    logging.info("Found Raydium AMM interaction in tx %s", sig_info['signature'])
+                    return True, "raydium", raydium_account, sig_info['signature']
+            
+            logging.info("Pump.fun Token Checks: No accounts owned by Pump.fun program found in recent transactions")
+
     except Exception as e:
-        logging.error(f"Error checking transactions: {str(e)}")           
+        logging.error("Error checking transactions: %s", e)           
    
     
     return False, None, None, None
 
+async def verify_pump_token(session: aiohttp.ClientSession, token_address: str, metadata: Optional[dict] = None) -> Tuple[bool, Optional[str], Optional[str], Optional[str]]:
+    """Verify if token is a genuine pump.fun token using new criteria"""
+    
+    # Step 1: Check update authority
+    if not metadata or metadata.get("update_authority") != PUMP_UPDATE_AUTHORITY:
+        logging.info("Token %s failed update authority check", token_address)
+        return False, None, None, None
+    
+    # Step 2: Check Raydium graduation and recent transactions concurrently.
+    # A Raydium listing takes precedence, and a failed Raydium lookup fails the check
+    txs_task = asyncio.create_task(_check_recent_txs(session, token_address))
+    try:
+        graduated = await _check_raydium(session, token_address)
+    except BaseException:
+        txs_task.cancel()
+        raise
+    if graduated is None or graduated:
+        txs_task.cancel()
+        return (True, "raydium", None, None) if graduated else (False, None, None, None)
+    
+    return await txs_task
+
+def _error_details(token_address: str) -> TokenDetails:
+    """Placeholder details for a token whose lookup failed"""
+    return TokenDetails(
+        name="ERROR",
+        symbol="ERROR",
+        address=token_address,
+        owner_program="Error",
+        freeze_authority=None,
+        security_review="FAILED"
+    )
+
+async def _fetch_mint_account(session: aiohttp.ClientSession, token_address: str) -> Tuple[int, Optional[Dict]]:
+    """Fetch the parsed mint account for a token, returning the HTTP status and decoded body"""
+    acc_info_params = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "getAccountInfo",
+        "params": [
+            token_address,
+            _MINT_INFO_OPTS
+        ]
+    }
+    
+    return await _rpc(session, acc_info_params)
+
 async def get_token_details_async(token_address: str, session: aiohttp.ClientSession) -> Tuple[TokenDetails, Optional[str]]:
     try:
-        # First get metadata to check update authority
-        metadata = await get_metadata(session, token_address)
-        #logging.info(f"Metadata response: {metadata}")
+        # Metadata (for the update authority) and the mint account (for program
+        # features) are independent, so fetch them concurrently
+        metadata, (status, acc_data) = await asyncio.gather(
+            get_metadata(session, token_address),
+            _fetch_mint_account(session, token_address)
+        )
         
-        # Get token account info to check program features
-        acc_info_params = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "getAccountInfo",
-            "params": [
-                token_address,
-                {"encoding": "jsonParsed"}
-            ]
-        }
+        # A failed request says nothing about the token, so report an error
+        # rather than falling through to the missing-account result below
+        if acc_data is None or "error" in acc_data:
+            logging.error("Mint account fetch for %s failed with status %s", token_address, status)
+            return _error_details(token_address), None
         
-        async with session.post(SOLANA_RPC_URL, json=acc_info_params) as response:
-            acc_data = await response.json()
-            if "result" in acc_data and acc_data["result"] and acc_data["result"]["value"]:
-                # Process token data to get security review
-                logging.info("Processing token account data for security review")
-                token_details, owner_program = process_token_data(acc_data["result"]["value"], token_address)
-                
-                # Update token details with metadata if available
-                if metadata:
-                    token_details.name = metadata.get("name", token_details.name)
-                    token_details.symbol = metadata.get("symbol", token_details.symbol)
-                    token_details.update_authority = metadata.get("update_authority")
-                    logging.info(f"Updated token details with metadata - Name: {token_details.name}, Symbol: {token_details.symbol}")
-            else:
-                logging.warning("No account data found for security review")
-                token_details = TokenDetails(
-                    name=metadata.get("name", "N/A") if metadata else "N/A",
-                    symbol=metadata.get("symbol", "N/A") if metadata else "N/A",
-                    address=token_address,
-                    owner_program=TOKEN_PROGRAM,
-                    freeze_authority=None,
-                    update_authority=metadata.get("update_authority") if metadata else None,
-                    security_review="FAILED"
-                )
-                owner_program = TOKEN_PROGRAM
+        if acc_data and acc_data.get("result") and acc_data["result"]["value"]:
+            # Process token data to get security review
+            logging.info("Processing token account data for security review")
+            token_details, owner_program = process_token_data(acc_data["result"]["value"], token_address)
+            
+            # Update token details with metadata if available
+            if metadata:
+                token_details.name = metadata.get("name", token_details.name)
+                token_details.symbol = metadata.get("symbol", token_details.symbol)
+                token_details.update_authority = metadata.get("update_authority")
+                logging.info("Updated token details with metadata - Name: %s, Symbol: %s", token_details.name, token_details.symbol)
+        else:
+            logging.warning("No account data found for security review")
+            token_details = TokenDetails(
+                name=metadata.get("name", "N/A") if metadata else "N/A",
+                symbol=metadata.get("symbol", "N/A") if metadata else "N/A",
+                address=token_address,
+                owner_program=TOKEN_PROGRAM,
+                freeze_authority=None,
+                update_authority=metadata.get("update_authority") if metadata else None,
+                security_review="FAILED"
+            )
+            owner_program = TOKEN_PROGRAM
             
         # Check if it's a potential pump token
-        is_pump_authority = metadata and metadata.get("update_authority") == "TSLvdd1pWpHVjahSpsvCXUbgwsL3JAcvokwaKt1eokM"
+        is_pump_authority = metadata and metadata.get("update_authority") == PUMP_UPDATE_AUTHORITY
         
         if is_pump_authority:
-            logging.info(f"Pump.fun Token Checks: Potential pump token detected")
+            logging.info("Pump.fun Token Checks: Potential pump token detected")
             is_genuine_pump_fun_token, interacted_with, interacting_account, interaction_signature = await verify_pump_token(session, token_address, metadata)
             
             token_details.is_genuine_pump_fun_token = is_genuine_pump_fun_token
@@ -509,15 +571,8 @@ async def get_token_details_async(token_address: str, session: aiohttp.ClientSes
         return token_details, owner_program
 
     except Exception as e:
-        logging.error(f"Unexpected error: {str(e)}")
-        return TokenDetails(
-            name="ERROR",
-            symbol="ERROR",
-            address=token_address,
-            owner_program="Error",
-            freeze_authority=None,
-            security_review="FAILED"
-        ), None
+        logging.error("Unexpected error: %s", e)
+        return _error_details(token_address), None
 
 def process_token_data(account_data: Dict, token_address: str) -> Tuple[TokenDetails, str]:
     """Process the token data and return structured information"""
@@ -534,7 +589,7 @@ def process_token_data(account_data: Dict, token_address: str) -> Tuple[TokenDet
         ), owner_program
 
     # Check if it's a valid token program
-    if owner_program not in [TOKEN_PROGRAM, TOKEN_2022_PROGRAM]:
+    if owner_program not in _TOKEN_PROGRAMS:
         return TokenDetails(
             name="N/A",
             symbol="N/A",
@@ -544,10 +599,11 @@ def process_token_data(account_data: Dict, token_address: str) -> Tuple[TokenDet
             security_review="NOT_A_TOKEN"
         ), owner_program
 
-    parsed_data = account_data.get("data", {}).get("parsed", {})
+    data = account_data.get("data")
+    parsed_data = data.get("parsed") if isinstance(data, dict) else None
     owner_label = get_owner_program_label(owner_program)
     
-    info = parsed_data.get("info", {})
+    info = (parsed_data.get("info") if parsed_data else None) or {}
     freeze_authority = info.get('freezeAuthority')
     
     base_details = TokenDetails(
@@ -563,7 +619,7 @@ def process_token_data(account_data: Dict, token_address: str) -> Tuple[TokenDet
     if owner_program == TOKEN_PROGRAM:
         # For standard SPL tokens, PASSED if no freeze authority
         base_details.security_review = "PASSED" if freeze_authority is None else "FAILED"
-        logging.info(f"Standard SPL token - Security review: {base_details.security_review}")
+        logging.info("Standard SPL token - Security review: %s", base_details.security_review)
     elif owner_program == TOKEN_2022_PROGRAM:
         base_details = process_token_2022_extensions(base_details, info)
     else:
@@ -571,26 +627,41 @@ def process_token_data(account_data: Dict, token_address: str) -> Tuple[TokenDet
 
     return base_details, owner_program
 
+def _handle_token_metadata(token_details: TokenDetails, extensions: Token2022Extensions, state: Dict) -> None:
+    token_details.name = state.get('name', token_details.name)
+    token_details.symbol = state.get('symbol', token_details.symbol)
+
+def _handle_permanent_delegate(token_details: TokenDetails, extensions: Token2022Extensions, state: Dict) -> None:
+    extensions.permanent_delegate = state.get("delegate")
+
+def _handle_transfer_fee_config(token_details: TokenDetails, extensions: Token2022Extensions, state: Dict) -> None:
+    newer_fee = state.get("newerTransferFee")
+    extensions.transfer_fee = newer_fee.get("transferFeeBasisPoints") if newer_fee else None
+
+def _handle_transfer_hook(token_details: TokenDetails, extensions: Token2022Extensions, state: Dict) -> None:
+    extensions.transfer_hook_authority = state.get("authority")
+
+def _handle_confidential_transfer_mint(token_details: TokenDetails, extensions: Token2022Extensions, state: Dict) -> None:
+    extensions.confidential_transfers_authority = state.get("authority")
+
+# Token 2022 extension type -> handler updating the token details or extensions
+_EXTENSION_HANDLERS = {
+    "tokenMetadata": _handle_token_metadata,
+    "permanentDelegate": _handle_permanent_delegate,
+    "transferFeeConfig": _handle_transfer_fee_config,
+    "transferHook": _handle_transfer_hook,
+    "confidentialTransferMint": _handle_confidential_transfer_mint,
+}
+
 def process_token_2022_extensions(token_details: TokenDetails, info: Dict) -> TokenDetails:
     """Process Token 2022 specific extensions"""
     extensions_info = info.get("extensions", [])
     extensions = Token2022Extensions()
 
     for extension in extensions_info:
-        ext_type = extension.get("extension")
-        state = extension.get("state", {})
-
-        if ext_type == "tokenMetadata":
-            token_details.name = state.get('name', token_details.name)
-            token_details.symbol = state.get('symbol', token_details.symbol)
-        elif ext_type == "permanentDelegate":
-            extensions.permanent_delegate = state.get("delegate")
-        elif ext_type == "transferFeeConfig":
-            extensions.transfer_fee = state.get("newerTransferFee", {}).get("transferFeeBasisPoints")
-        elif ext_type == "transferHook":
-            extensions.transfer_hook_authority = state.get("authority")
-        elif ext_type == "confidentialTransferMint":
-            extensions.confidential_transfers_authority = state.get("authority")
+        handler = _EXTENSION_HANDLERS.get(extension.get("extension"))
+        if handler:
+            handler(token_details, extensions, extension.get("state") or {})
 
     token_details.extensions = extensions
 
@@ -600,34 +671,156 @@ def process_token_2022_extensions(token_details: TokenDetails, info: Dict) -> To
         extensions.permanent_delegate is not None,
         extensions.transfer_hook_authority is not None,
         extensions.confidential_transfers_authority is not None,
-        extensions.transfer_fee not in [None, 0]
+        extensions.transfer_fee not in _ZERO_FEES
     ])
     
     token_details.security_review = "FAILED" if has_security_features else "PASSED"
-    logging.info(f"Token-2022 - Security review: {token_details.security_review}")
+    logging.info("Token-2022 - Security review: %s", token_details.security_review)
     return token_details
 
-async def process_tokens_concurrently(token_addresses: List[str], session: aiohttp.ClientSession) -> List[Dict]:
+# (RPC endpoint, token address) -> (expiry, details result), plus lookups in progress
+# Entries are kept in insertion order, which with a fixed TTL is also expiry order
+_TOKEN_CACHE: "OrderedDict[Tuple[str, str], Tuple[float, Tuple[TokenDetails, Optional[str]]]]" = OrderedDict()
+_TOKEN_IN_FLIGHT: Dict[Tuple[str, str], "asyncio.Task"] = {}
+
+def _cache_token_details(key: Tuple[str, str], result: Tuple[TokenDetails, Optional[str]]) -> None:
+    now = time.monotonic()
+    # Drop expired entries, which sit at the oldest end
+    while _TOKEN_CACHE and next(iter(_TOKEN_CACHE.values()))[0] <= now:
+        _TOKEN_CACHE.popitem(last=False)
+    _TOKEN_CACHE[key] = (now + TOKEN_CACHE_TTL, result)
+    _TOKEN_CACHE.move_to_end(key)
+    # Evict the oldest entries beyond the size limit
+    while len(_TOKEN_CACHE) > TOKEN_CACHE_SIZE:
+        _TOKEN_CACHE.popitem(last=False)
+
+async def _fetch_token_details(key: Tuple[str, str], token_address: str, session: aiohttp.ClientSession) -> Tuple[TokenDetails, Optional[str]]:
+    try:
+        result = await get_token_details_async(token_address, session)
+        # Failed lookups have no owner program and are retried on the next request
+        if result[1] is not None:
+            _cache_token_details(key, result)
+        return result
+    finally:
+        if _TOKEN_IN_FLIGHT.get(key) is asyncio.current_task():
+            del _TOKEN_IN_FLIGHT[key]
+
+async def get_token_details_cached(token_address: str, session: aiohttp.ClientSession) -> Tuple[TokenDetails, Optional[str]]:
+    """get_token_details_async with a short-lived cache, sharing one lookup between concurrent callers"""
+    key = (SOLANA_RPC_URL, token_address)
+    cached = _TOKEN_CACHE.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    
+    task = _TOKEN_IN_FLIGHT.get(key)
+    # Tasks are bound to their event loop, which differs between asyncio.run calls
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.create_task(_fetch_token_details(key, token_address, session))
+        _TOKEN_IN_FLIGHT[key] = task
+    # Shield the shared lookup so one cancelled caller does not cancel it for the others
+    return await asyncio.shield(task)
+
+async def _process_token(token_address: str, session: aiohttp.ClientSession) -> Dict:
+    details, owner_program = await get_token_details_cached(token_address, session)
+    # Failed lookups come back without an owner program
+    if isinstance(details, TokenDetails) and owner_program is not None:
+        return {
+            'address': token_address,
+            'status': 'success',
+            **details.to_dict()
+        }
+    return {
+        'address': token_address,
+        'status': 'error',
+        'error': "Failed to fetch token details from the RPC"
+    }
+
+async def process_tokens_concurrently(token_addresses: List[str], session: aiohttp.ClientSession,
+                                      concurrency: int = CONCURRENT_LIMIT) -> List[Dict]:
     """Process multiple tokens concurrently with rate limiting"""
-    semaphore = asyncio.Semaphore(CONCURRENT_LIMIT)
+    semaphore = asyncio.Semaphore(concurrency)
     total_tokens = len(token_addresses)
     
     async def process_single_token(token_address: str, index: int) -> Dict:
         async with semaphore:
-            logging.info(f"Processing token {index + 1}/{total_tokens} - {token_address}")
-            details, owner_program = await get_token_details_async(token_address, session)
-            if isinstance(details, TokenDetails):
-                return {
+            logging.info("Processing token %d/%d - %s", index + 1, total_tokens, token_address)
+            return await _process_token(token_address, session)
+    
+    # A failure cancels the remaining tokens instead of letting them run on
+    async with asyncio.TaskGroup() as task_group:
+        tasks = [
+            task_group.create_task(process_single_token(addr, idx))
+            for idx, addr in enumerate(token_addresses)
+        ]
+    return [task.result() for task in tasks]
+
+async def stream_tokens_concurrently(token_addresses: Union[Iterable[str], AsyncIterable[str]],
+                                     session: aiohttp.ClientSession,
+                                     concurrency: int = CONCURRENT_LIMIT) -> AsyncIterator[Dict]:
+    """Process tokens with a fixed pool of workers, yielding each result as soon as it completes
+
+    token_addresses is consumed lazily, so only a bounded number of addresses
+    is held in memory at once.
+    """
+    pending: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    # Bounded as well, so a slow consumer holds back the workers
+    completed: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    
+    async def stop_workers():
+        for _ in range(concurrency):
+            await pending.put(None)
+    
+    async def produce():
+        try:
+            index = 0
+            if isinstance(token_addresses, AsyncIterable):
+                async for token_address in token_addresses:
+                    await pending.put((index, token_address))
+                    index += 1
+            else:
+                for token_address in token_addresses:
+                    await pending.put((index, token_address))
+                    index += 1
+        except asyncio.CancelledError:
+            # The workers are cancelled along with the producer
+            raise
+        except Exception:
+            # Let the workers finish the queued addresses before the error surfaces
+            await stop_workers()
+            raise
+        await stop_workers()
+    
+    async def work():
+        while (item := await pending.get()) is not None:
+            index, token_address = item
+            logging.info("Processing token %d - %s", index + 1, token_address)
+            try:
+                result = await _process_token(token_address, session)
+            except Exception as e:
+                # Keep the worker alive and report the token instead of dropping it
+                logging.error("Error processing token %s: %s", token_address, e)
+                result = {
                     'address': token_address,
-                    'status': 'success',
-                    **details.to_dict()
+                    'status': 'error',
+                    'error': str(e)
                 }
-            return {
-                'address': token_address,
-                'status': 'error',
-                'error': str(details)
-            }
+            await completed.put(result)
+        await completed.put(None)
     
-    return await asyncio.gather(
-        *(process_single_token(addr, idx) for idx, addr in enumerate(token_addresses))
-    )
+    producer = asyncio.create_task(produce())
+    workers = [asyncio.create_task(work()) for _ in range(concurrency)]
+    try:
+        running = len(workers)
+        while running:
+            result = await completed.get()
+            if result is None:
+                running -= 1
+            else:
+                yield result
+        # Surface a failure to read the addresses
+        await producer
+    finally:
+        # Stop outstanding lookups if the consumer stops early
+        producer.cancel()
+        for worker in workers:
+            worker.cancel()
@@ -1,13 +1,165 @@
 import argparse
 import asyncio
-import aiohttp
-from spl_token_analysis import get_token_details_async, process_tokens_concurrently
+from spl_token_analysis import _UNSET_VALUES, CONCURRENT_LIMIT, TOKEN_2022_PROGRAM, create_session, get_token_details_cached, stream_tokens_concurrently
 from spl_report_generator import create_pdf
 import os
 import json
 import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime
 
+try:
+    import uvloop
+except ImportError:  # Optional, and not available on Windows
+    uvloop = None
+
+# Shared encoder for result files; encoding to one string avoids json.dump's many small writes
+_JSON_ENCODER = json.JSONEncoder(indent=2)
+
+# CLI output; formatted lazily so suppressed messages cost nothing
+logger = logging.getLogger(__name__)
+
+# Approximate bytes of the batch input file read at a time
+INPUT_CHUNK_SIZE = 64 * 1024
+# Minimum seconds between batch progress messages
+PROGRESS_INTERVAL = 2.0
+
+# Token 2022 features that need a mitigation when set
+_TOKEN22_FEATURES = ('permanent_delegate', 'transfer_hook', 'confidential_transfers', 'transaction_fees')
+
+# Blocking file helpers, run in a worker thread so the event loop keeps serving requests
+def load_json(path: str):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def write_text(path: str, text: str):
+    with open(path, 'w') as f:
+        f.write(text)
+
+class UniqueAddressReader:
+    """Async iterator over the unique, non-blank token addresses of an open input file"""
+    def __init__(self, file):
+        self._file = file
+        self.count = 0
+        self.duplicates = 0
+
+    async def __aiter__(self):
+        seen = set()
+        # Read in chunks of lines off the event loop, keeping the input order
+        while lines := await asyncio.to_thread(self._file.readlines, INPUT_CHUNK_SIZE):
+            for line in lines:
+                address = line.strip()
+                if not address:
+                    continue
+                if address in seen:
+                    self.duplicates += 1
+                    continue
+                seen.add(address)
+                self.count += 1
+                yield address
+
+class BatchProgress:
+    """Count generated batch reports, logging progress at most once per interval"""
+    def __init__(self, interval: float = PROGRESS_INTERVAL):
+        self.generated = 0
+        self.failed = 0
+        self._interval = interval
+        self._next_report = time.monotonic() + interval
+
+    def update(self, failed: bool = False):
+        if failed:
+            self.failed += 1
+        else:
+            self.generated += 1
+        now = time.monotonic()
+        if now >= self._next_report:
+            self._next_report = now + self._interval
+            self.log()
+
+    def log(self):
+        logger.info("Generated %d reports (%d failed)", self.generated, self.failed)
+
+class JsonArrayWriter:
+    """Write a JSON array to a file one item at a time, formatted like json.dump(..., indent=2)"""
+    def __init__(self, file):
+        self._file = file
+        self._count = 0
+
+    def __enter__(self):
+        self._file.write('[')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.write('\n]' if self._count else ']')
+        return False
+
+    def append(self, item):
+        # Nest the item's own indented dump one level into the array
+        self._file.write(',\n  ' if self._count else '\n  ')
+        self._file.write(_JSON_ENCODER.encode(item).replace('\n', '\n  '))
+        self._count += 1
+
+def apply_mitigations(result_dict: dict, token_mitigations: dict):
+    """Record a token's documented mitigations and recalculate its security review"""
+    applied = result_dict.setdefault('mitigations', {})
+    for check, mitigation in token_mitigations.items():
+        if isinstance(mitigation, dict):
+            _mget = mitigation.get
+            applied[check] = {
+                'documentation': _mget('documentation', ''),
+                'applied': _mget('applied', False)
+            }
+    
+    # With nothing applied the review computed during analysis already stands
+    if not any(mitigation.get('applied') for mitigation in applied.values()):
+        return
+    
+    # Security review fails on the first risk without an applied mitigation;
+    # bound methods are aliased once for the feature scan
+    _get = result_dict.get
+    _applied_get = applied.get
+    has_unmitigated_risks = bool(
+        (_get('freeze_authority')
+         and not (_applied_get('freeze_authority') or {}).get('applied', False))
+        or (_get('owner_program', '').startswith(TOKEN_2022_PROGRAM) and any(
+            _get(feature) not in _UNSET_VALUES
+            and not (_applied_get(feature) or {}).get('applied', False)
+            for feature in _TOKEN22_FEATURES
+        ))
+    )
+    result_dict['security_review'] = 'FAILED' if has_unmitigated_risks else 'PASSED'
+
+def build_report(result_dict: dict, token_mitigations: dict, output_dir: str, review_date: str) -> str:
+    """Apply a token's mitigations and reviewer fields to its result and render the PDF report"""
+    # Tokens without mitigations keep the security review computed during analysis
+    if token_mitigations:
+        apply_mitigations(result_dict, token_mitigations)
+    
+    result_dict['reviewer_name'] = 'SPL-AUTOMATION'
+    result_dict['confirmation_status'] = 'Confirmed'
+    return create_pdf(result_dict, output_dir, review_date)
+
+async def write_pdf_report(executor: Executor, slots: asyncio.Semaphore, progress: BatchProgress,
+                           result_dict: dict, token_mitigations: dict, output_dir: str, token_address: str,
+                           review_date: str):
+    """Build a batch report in the given executor, recording the outcome
+
+    The caller acquires one of the slots before scheduling the report; it is released here.
+    """
+    try:
+        await asyncio.get_running_loop().run_in_executor(
+            executor, build_report, result_dict, token_mitigations, output_dir, review_date
+        )
+        progress.update()
+    except Exception as e:
+        logger.error("Error generating PDF for %s: %s", token_address, e)
+        progress.update(failed=True)
+    finally:
+        slots.release()
+
 async def generate_single_report(token_address: str, output_dir: str = None, mitigation_file: str = None):
     """Generate a security report for a single token address"""
     if not output_dir:
@@ -17,67 +169,46 @@ async def generate_single_report(token_address: str, output_dir: str = None, mit
     mitigations = {}
     if mitigation_file:
         try:
-            with open(mitigation_file, 'r') as f:
-                mitigations = json.load(f)
+            mitigations = await asyncio.to_thread(load_json, mitigation_file)
         except Exception as e:
-            print(f"Error loading mitigation file: {e}")
+            logger.error("Error loading mitigation file: %s", e)
             return
     
-    async with aiohttp.ClientSession() as session:
-        token_details, _ = await get_token_details_async(token_address, session)
+    async with create_session() as session:
+        token_details, owner_program = await get_token_details_cached(token_address, session)
         
-        if isinstance(token_details, str):
-            print(f"Error: {token_details}")
+        # Failed lookups come back without an owner program
+        if owner_program is None:
+            logger.error("Error: failed to fetch token details for %s", token_address)
             return
             
         result_dict = token_details.to_dict()
         
         # Apply mitigations if available
-        if token_address in mitigations:
-            token_mitigations = mitigations[token_address]
-            if 'mitigations' not in result_dict:
-                result_dict['mitigations'] = {}
-            
-            for check, mitigation in token_mitigations.items():
-                if isinstance(mitigation, dict):
-                    result_dict['mitigations'][check] = {
-                        'documentation': mitigation.get('documentation', ''),
-                        'applied': mitigation.get('applied', False)
-                    }
-            
-            # Recalculate security review based on mitigations
-            has_unmitigated_risks = False
-            if result_dict.get('freeze_authority'):
-                if not result_dict['mitigations'].get('freeze_authority', {}).get('applied', False):
-                    has_unmitigated_risks = True
-            
-            if "Token 2022" in result_dict.get('owner_program', ''):
-                for feature in ['permanent_delegate', 'transfer_hook', 'confidential_transfers', 'transaction_fees']:
-                    value = result_dict.get(feature)
-                    if value not in [None, 0, 'None']:
-                        if not result_dict['mitigations'].get(feature, {}).get('applied', False):
-                            has_unmitigated_risks = True
-                            break
-            
-            result_dict['security_review'] = 'FAILED' if has_unmitigated_risks else 'PASSED'
+        token_mitigations = mitigations.get(token_address)
+        if token_mitigations:
+            apply_mitigations(result_dict, token_mitigations)
         
         result_dict['reviewer_name'] = 'SPL-AUTOMATION'
         result_dict['confirmation_status'] = 'Confirmed'
         
         try:
-            pdf_path = create_pdf(result_dict, output_dir)
-            print(f"\nReport generated successfully: {pdf_path}")
+            now = datetime.now()
+            pdf_path = await asyncio.get_running_loop().run_in_executor(
+                None, create_pdf, result_dict, output_dir, now.strftime("%Y-%m-%d")
+            )
+            logger.info("\nReport generated successfully: %s", pdf_path)
             
             # Save JSON result
-            json_output = f"token_analysis_{token_address}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(os.path.join(output_dir, json_output), 'w') as f:
-                json.dump(result_dict, f, indent=2)
-            print(f"Analysis results saved to: {json_output}")
+            json_output = f"token_analysis_{token_address}_{now.strftime('%Y%m%d_%H%M%S')}.json"
+            await asyncio.to_thread(write_text, os.path.join(output_dir, json_output), _JSON_ENCODER.encode(result_dict))
+            logger.info("Analysis results saved to: %s", json_output)
             
         except Exception as e:
-            print(f"Error generating report: {e}")
+            logger.error("Error generating report: %s", e)
 
-async def generate_batch_reports(input_file: str, output_dir: str = None, mitigation_file: str = None):
+async def generate_batch_reports(input_file: str, output_dir: str = None, mitigation_file: str = None,
+                                 concurrency: int = CONCURRENT_LIMIT):
     """Generate security reports for multiple tokens from input file"""
     if not output_dir:
         output_dir = os.getcwd()
@@ -86,81 +217,73 @@ async def generate_batch_reports(input_file: str, output_dir: str = None, mitiga
     mitigations = {}
     if mitigation_file:
         try:
-            with open(mitigation_file, 'r') as f:
-                mitigations = json.load(f)
-            print(f"Loaded mitigations from {mitigation_file}")
+            mitigations = await asyncio.to_thread(load_json, mitigation_file)
+            logger.info("Loaded mitigations from %s", mitigation_file)
         except Exception as e:
-            print(f"Error loading mitigation file: {e}")
+            logger.error("Error loading mitigation file: %s", e)
             return
         
     try:
-        with open(input_file, 'r') as f:
-            token_addresses = [line.strip() for line in f if line.strip()]
-            
-        print(f"\nProcessing {len(token_addresses)} tokens...")
-        
-        async with aiohttp.ClientSession() as session:
-            results = await process_tokens_concurrently(token_addresses, session)
+        with open(input_file, 'r') as input_lines:
+            # Addresses are read lazily, so work starts before the whole file is read
+            token_addresses = UniqueAddressReader(input_lines)
+            logger.info("\nProcessing tokens from %s...", input_file)
             
-            # Generate timestamp for batch processing
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # Apply mitigations and generate reports
-            for result in results:
-                if result['status'] == 'success':
-                    token_address = result['address']
-                    result_dict = result.copy()
-                    
-                    # Apply mitigations if available
-                    if token_address in mitigations:
-                        token_mitigations = mitigations[token_address]
-                        if 'mitigations' not in result_dict:
-                            result_dict['mitigations'] = {}
-                        
-                        for check, mitigation in token_mitigations.items():
-                            if isinstance(mitigation, dict):
-                                result_dict['mitigations'][check] = {
-                                    'documentation': mitigation.get('documentation', ''),
-                                    'applied': mitigation.get('applied', False)
-                                }
-                        
-                        # Recalculate security review
-                        has_unmitigated_risks = False
-                        if result_dict.get('freeze_authority'):
-                            if not result_dict['mitigations'].get('freeze_authority', {}).get('applied', False):
-                                has_unmitigated_risks = True
-                        
-                        if "Token 2022" in result_dict.get('owner_program', ''):
-                            for feature in ['permanent_delegate', 'transfer_hook', 'confidential_transfers', 'transaction_fees']:
-                                value = result_dict.get(feature)
-                                if value not in [None, 0, 'None']:
-                                    if not result_dict['mitigations'].get(feature, {}).get('applied', False):
-                                        has_unmitigated_risks = True
-                                        break
-                        
-                        result_dict['security_review'] = 'FAILED' if has_unmitigated_risks else 'PASSED'
+            async with create_session() as session:
+                # Generate timestamp and report date once for the whole batch
+                started = datetime.now()
+                timestamp = started.strftime("%Y%m%d_%H%M%S")
+                review_date = started.strftime("%Y-%m-%d")
+                
+                # Build reports in worker processes so they overlap the remaining lookups.
+                # At most one report per worker is queued, so pending results cannot
+                # pile up when rendering falls behind the lookups. Workers are spawned
+                # rather than forked, since the loop already runs helper threads
+                pdf_workers = os.cpu_count() or 1
+                pdf_slots = asyncio.Semaphore(pdf_workers)
+                pdf_jobs = set()
+                progress = BatchProgress()
+                json_output = f"batch_results_{timestamp}.json"
+                with open(os.path.join(output_dir, json_output), 'w') as f, \
+                        JsonArrayWriter(f) as results, \
+                        ProcessPoolExecutor(max_workers=pdf_workers,
+                                            mp_context=multiprocessing.get_context("spawn")) as pdf_pool:
+                    # Save results and hand reports to the workers as each token
+                    # completes; results are saved in completion order
+                    async for result in stream_tokens_concurrently(token_addresses, session, concurrency):
+                        results.append(result)
+                        if result['status'] == 'success':
+                            token_address = result['address']
+                            await pdf_slots.acquire()
+                            pdf_job = asyncio.create_task(write_pdf_report(
+                                pdf_pool, pdf_slots, progress, result, mitigations.get(token_address),
+                                output_dir, token_address, review_date
+                            ))
+                            # Finished jobs drop out so the set only holds reports in flight
+                            pdf_jobs.add(pdf_job)
+                            pdf_job.add_done_callback(pdf_jobs.discard)
+                        else:
+                            logger.warning("Skipping PDF generation for %s: %s", result['address'], result['error'])
                     
-                    result_dict['reviewer_name'] = 'SPL-AUTOMATION'
-                    result_dict['confirmation_status'] = 'Confirmed'
-                    
-                    try:
-                        pdf_path = create_pdf(result_dict, output_dir)
-                        print(f"Generated report: {pdf_path}")
-                    except Exception as e:
-                        print(f"Error generating PDF for {token_address}: {e}")
-                else:
-                    print(f"Skipping PDF generation for {result['address']}: {result['error']}")
+                    await asyncio.gather(*pdf_jobs)
+                progress.log()
             
-            # Save JSON results
-            json_output = f"batch_results_{timestamp}.json"
-            with open(os.path.join(output_dir, json_output), 'w') as f:
-                json.dump(results, f, indent=2)
-            print(f"\nBatch processing complete. Results saved to {json_output}")
+            if token_addresses.duplicates:
+                logger.info("Skipped %d duplicate token addresses", token_addresses.duplicates)
+            logger.info("\nBatch processing complete. Processed %d tokens. Results saved to %s",
+                        token_addresses.count, json_output)
             
     except FileNotFoundError:
-        print(f"Error: Input file '{input_file}' not found")
+        logger.error("Error: Input file '%s' not found", input_file)
     except Exception as e:
-        print(f"Error during batch processing: {e}")
+        logger.error("Error during batch processing: %s", e)
+
+def positive_int(value: str) -> int:
+    """argparse type accepting integers of at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
 
 def main():
     parser = argparse.ArgumentParser(description='Generate Solana Token Security Report(s)')
@@ -168,18 +291,32 @@ def main():
     parser.add_argument('--batch', '-b', action='store_true', help='Process input as a batch file')
     parser.add_argument('--output', '-o', help='Output directory for the report(s)')
     parser.add_argument('--mitigation', '-m', help='JSON file containing mitigation documentation')
+    parser.add_argument('--concurrency', '-c', type=positive_int, default=CONCURRENT_LIMIT,
+                        help=f'Maximum number of tokens processed at once in batch mode (default: {CONCURRENT_LIMIT})')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Only print warnings and errors')
     
     args = parser.parse_args()
     
+    # Print CLI messages as plain lines on stdout, separately from library logging
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING if args.quiet else logging.INFO)
+    logger.propagate = False
+    
+    # Prefer the libuv based event loop for the many concurrent RPC requests
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
     # Create output directory if it doesn't exist
     if args.output:
         os.makedirs(args.output, exist_ok=True)
     
     if args.batch:
-        print(f"\nStarting batch processing from file: {args.input}")
-        asyncio.run(generate_batch_reports(args.input, args.output, args.mitigation))
+        logger.info("\nStarting batch processing from file: %s", args.input)
+        asyncio.run(generate_batch_reports(args.input, args.output, args.mitigation, args.concurrency))
     else:
-        print(f"\nGenerating security report for token: {args.input}")
+        logger.info("\nGenerating security report for token: %s", args.input)
         asyncio.run(generate_single_report(args.input, args.output, args.mitigation))
 
 if __name__ == "__main__":